@@ -0,0 +1,189 @@
+"""Directory walking shared by the directory listing tools."""
+import fnmatch
+import functools
+import itertools
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+# Upper bound on the threads reading directories during a single walk.
+MAX_WALK_WORKERS = 32
+# Largest number of files a single directory listing returns.
+DEFAULT_MAX_LISTED_FILES = 5000
+# Number of directory listings each DirectoryReadTool keeps in memory.
+DEFAULT_LISTING_CACHE_SIZE = 128
+
+@functools.lru_cache(maxsize=32)
+def compile_ignore_patterns(patterns: FrozenSet[str]) -> Optional["re.Pattern[str]"]:
+    """
+    Compile directory name glob patterns, such as '*.egg-info', into a single regular expression.
+
+    Args:
+        patterns (FrozenSet[str]): The patterns; plain names only match themselves.
+
+    Returns:
+        Optional[re.Pattern[str]]: A regex whose match() accepts any name matching one of the patterns, or
+        None if there are no patterns.
+    """
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(pattern) for pattern in sorted(patterns)))
+
+def walk_files(
+        directory: str,
+        ignore_set: FrozenSet[str] = frozenset(),
+        is_ignored: Optional[Callable[[str, bool], bool]] = None,
+        recursive: bool = True,
+        ) -> Iterator[str]:
+    """
+    Lazily yield the paths of the files under a directory, depth-first.
+
+    Entries are classified with DirEntry.is_dir(follow_symlinks=False), which needs no extra stat call, so
+    symlinks are never followed. As with os.walk, symlinks to directories are left out and other symlinks
+    are listed as files; only symlinks cost a stat to tell the two apart. Directories are read concurrently
+    by a thread pool, as scandir releases the GIL while it waits on the file system. All subdirectories of a
+    directory are submitted as soon as it has been read, but results are consumed in submission order, so
+    the listing is the same as a sequential walk. Closing the generator early cancels the scans still
+    pending.
+
+    Args:
+        directory (str): The directory to walk, without a trailing slash.
+        ignore_set (FrozenSet[str]): Names or glob patterns of subdirectories to skip at any depth.
+        is_ignored (Optional[Callable[[str, bool], bool]]): Called with the path of each entry and whether it
+            is a directory; entries for which it returns True are skipped.
+        recursive (bool): Walk the subdirectories too. When False, only the files directly in directory
+            are listed.
+
+    Yields:
+        str: The path of each file, prefixed with directory.
+    """
+    ignore_pattern = compile_ignore_patterns(frozenset(ignore_set))
+
+    def scan(path: str) -> Tuple[List[str], List[str]]:
+        subdirectories, files = [], []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        if recursive and (ignore_pattern is None or not ignore_pattern.match(entry.name)) \
+                                and (is_ignored is None or not is_ignored(entry.path, True)):
+                            subdirectories.append(entry.path)
+                    elif entry.is_symlink() and entry.is_dir():
+                        continue
+                    elif is_ignored is None or not is_ignored(entry.path, False):
+                        files.append(entry.path)
+        except OSError:
+            pass
+        return subdirectories, files
+
+    executor = ThreadPoolExecutor(max_workers=min(MAX_WALK_WORKERS, (os.cpu_count() or 1) * 4))
+    try:
+        stack = [iter([executor.submit(scan, directory)])]
+        while stack:
+            future = next(stack[-1], None)
+            if future is None:
+                stack.pop()
+                continue
+            subdirectories, files = future.result()
+            yield from files
+            if subdirectories:
+                stack.append(iter([executor.submit(scan, path) for path in subdirectories]))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def format_listing(paths: Iterator[str], max_entries: Optional[int] = None) -> str:
+    """
+    Format listed paths with forward slashes, consuming the iterator lazily and stopping after max_entries.
+
+    Args:
+        paths (Iterator[str]): The paths to list.
+        max_entries (Optional[int]): Largest number of paths to include. None or zero lists them all.
+
+    Returns:
+        str: The formatted list of file paths, with a note when it was truncated.
+    """
+    files = paths if os.sep == "/" else (path.replace(os.sep, "/") for path in paths)
+    # The header is joined in with the paths, so the listing is built in a single pass without a list.
+    limited = itertools.islice(files, max_entries) if max_entries else files
+    listing = "\n- ".join(itertools.chain(("File paths: ",), limited))
+    if max_entries and next(files, None) is not None:
+        listing += f"\n\nOnly the first {max_entries} files are listed. List a subdirectory to see the rest."
+    if hasattr(paths, "close"):
+        # Stops a walk that was cut short.
+        paths.close()
+    return listing
+
+def listing_args(
+        kwargs: Dict[str, Any], default_directory: Optional[str], default_ignore_set: FrozenSet[str],
+        ) -> Tuple[Optional[str], FrozenSet[str]]:
+    """
+    Resolve the directory and ignored names of a listing request made to a DirectoryReadTool.
+
+    Args:
+        kwargs (Dict[str, Any]): The tool arguments, with optional 'directory' and 'ignore_dirs'.
+        default_directory (Optional[str]): The directory the tool was configured with.
+        default_ignore_set (FrozenSet[str]): The ignored names the tool was configured with.
+
+    Returns:
+        Tuple[Optional[str], FrozenSet[str]]: The directory without a trailing slash, or None if neither
+        the request nor the tool names one, and the names or glob patterns of subdirectories to skip.
+    """
+    directory = kwargs.get("directory") or default_directory
+    if directory:
+        directory = directory.rstrip("/") or "/"
+    ignore_dirs: Optional[Iterable[str]] = kwargs.get("ignore_dirs")
+    return directory or None, default_ignore_set if ignore_dirs is None else frozenset(ignore_dirs)
+
+class ListingCache:
+    """
+    Thread-safe LRU cache of directory listings.
+
+    Agents list the same directory over and over. The modification time of the listed directory is part
+    of every key, which refreshes the listing when an entry is added to or removed from the directory
+    itself.
+
+    Args:
+        max_size (int): Number of listings kept before the least recently used one is evicted.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_LISTING_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_list(self, directory: str, key: Tuple[Hashable, ...], list_directory: Callable[[], str]) -> str:
+        """
+        Return the cached listing of a directory, or list it and cache the result.
+
+        Args:
+            directory (str): The listed directory, whose modification time is added to the key.
+            key (Tuple[Hashable, ...]): Everything else the listing depends on.
+            list_directory (Callable[[], str]): Builds the listing on a miss. Its result is not cached if
+                the directory cannot be stat'ed.
+
+        Returns:
+            str: The listing.
+        """
+        try:
+            key = (*key, os.stat(directory).st_mtime_ns)
+        except OSError:
+            return list_directory()
+        with self._lock:
+            listing = self._entries.get(key)
+            if listing is not None:
+                self._entries.move_to_end(key)
+                return listing
+
+        listing = list_directory()
+        with self._lock:
+            self._entries[key] = listing
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return listing
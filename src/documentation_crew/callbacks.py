@@ -0,0 +1,200 @@
+"""LangChain callback handlers that surface LLM output while the crew is still running."""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from langchain_core.callbacks import BaseCallbackHandler
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# Flush thresholds for streamed tokens; whichever is reached first triggers a flush.
+DEFAULT_BATCH_MAX_TOKENS = 50
+DEFAULT_BATCH_MAX_INTERVAL_MS = 50
+# The token threshold starts at 1 and is multiplied by this after every flush, up to the maximum.
+DEFAULT_BATCH_SIZE_GROWTH_FACTOR = 2
+
+
+def attach_script_run_ctx(ctx: Optional[Any]) -> None:
+    """
+    Attach a Streamlit ScriptRunContext to the current thread if it does not have one yet.
+
+    Async kickoffs run the crew in worker threads, and Streamlit drops UI calls made from threads
+    that are not bound to a session.
+    """
+    if ctx is not None and get_script_run_ctx(suppress_warning=True) is None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+
+class TokenBatcher:
+    """
+    Coalesces streamed tokens into batches before handing them to a sink.
+
+    Args:
+        sink (Callable[[str], None]): Called with the concatenated tokens of each batch.
+        max_tokens (int): Largest number of tokens held before a flush.
+        max_interval_ms (int): Longest time in milliseconds a token waits before a flush.
+        growth_factor (int): How fast the token threshold ramps up from 1 to max_tokens, so the first
+            tokens of a response are still shown immediately.
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[str], None],
+        max_tokens: int = DEFAULT_BATCH_MAX_TOKENS,
+        max_interval_ms: int = DEFAULT_BATCH_MAX_INTERVAL_MS,
+        growth_factor: int = DEFAULT_BATCH_SIZE_GROWTH_FACTOR,
+    ):
+        self._sink = sink
+        self.max_tokens = max_tokens
+        self.max_interval = max_interval_ms / 1000
+        self.growth_factor = growth_factor
+        self._buffer: List[str] = []
+        self._batch_size = 1
+        self._last_flush = time.monotonic()
+
+    def add(self, token: str) -> None:
+        """Buffer a token, flushing if either threshold has been reached."""
+        self._buffer.append(token)
+        if len(self._buffer) >= self._batch_size or time.monotonic() - self._last_flush >= self.max_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Hand any buffered tokens to the sink and grow the batch size."""
+        if self._buffer:
+            self._sink("".join(self._buffer))
+            self._buffer.clear()
+            self._batch_size = min(self.max_tokens, self._batch_size * self.growth_factor)
+        self._last_flush = time.monotonic()
+
+    def reset(self) -> None:
+        """Drop buffered tokens and restart the ramp-up for a new response."""
+        self._buffer.clear()
+        self._batch_size = 1
+        self._last_flush = time.monotonic()
+
+
+class StreamlitTokenHandler(BaseCallbackHandler):
+    """
+    Streams the tokens of a single agent's LLM calls into a Streamlit placeholder.
+
+    Tokens are coalesced with a TokenBatcher so the placeholder is re-rendered once per batch
+    rather than once per token.
+
+    Args:
+        agent_name (str): The agent name shown above the streamed text.
+        script_run_ctx (Optional[Callable[[], Any]]): Returns the ScriptRunContext of the session to
+            render into, for runs that execute outside the Streamlit script thread.
+        placeholder (Optional[Callable[[], Any]]): Returns the placeholder to render into. Defaults to a
+            new chat message for every LLM call.
+
+    Attributes:
+        streamed (bool): True once at least one token has been received for the current LLM call.
+    """
+
+    def __init__(
+        self,
+        agent_name: str,
+        script_run_ctx: Optional[Callable[[], Any]] = None,
+        placeholder: Optional[Callable[[], Any]] = None,
+    ):
+        self.agent_name = agent_name
+        self._script_run_ctx = script_run_ctx
+        self._placeholder_factory = placeholder
+        self.streamed = False
+        self._placeholder = None
+        self._text = ""
+        self._batcher = TokenBatcher(self._render)
+
+    def _render(self, chunk: str) -> None:
+        if self._script_run_ctx is not None:
+            attach_script_run_ctx(self._script_run_ctx())
+        self._text += chunk
+        if self._placeholder_factory is not None:
+            if self._placeholder is None:
+                self._placeholder = self._placeholder_factory()
+            self._placeholder.markdown(self._text)
+        else:
+            if self._placeholder is None:
+                self._placeholder = st.chat_message("AI").empty()
+            self._placeholder.markdown(f"**{self.agent_name}**\n\n{self._text}")
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any) -> None:
+        # Each LLM call starts over in its placeholder, which is looked up lazily on the first flush.
+        self._batcher.reset()
+        self._placeholder = None
+        self._text = ""
+        self.streamed = False
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self._batcher.add(token)
+        self.streamed = True
+
+    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        self._batcher.flush()
+        self._placeholder = None
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        self._batcher.flush()
+        self._placeholder = None
+
+
+class FileSinkCallbackHandler(BaseCallbackHandler):
+    """
+    Appends the tokens of an agent's LLM calls to a file while they are generated.
+
+    The file is a transcript of the raw LLM output, including the agent's reasoning, so a long run
+    can be followed on disk without holding the output in memory. Tokens are coalesced with a
+    TokenBatcher and each batch is flushed to the file.
+
+    Args:
+        path (str): The transcript file. It is truncated by the first write after creation or reset.
+        buffering (int): Buffer size of the file handle in bytes.
+    """
+
+    def __init__(self, path: str, buffering: int = 8192):
+        self.path = path
+        self.buffering = buffering
+        self._file = None
+        self._truncate = True
+        self._batcher = TokenBatcher(self._write)
+
+    def _write(self, chunk: str) -> None:
+        if self._file is None:
+            self._file = open(self.path, "w" if self._truncate else "a", encoding="utf-8", buffering=self.buffering)
+            self._truncate = False
+        self._file.write(chunk)
+        self._file.flush()
+
+    def close(self) -> None:
+        """Write any buffered tokens and close the file until the next LLM call."""
+        self._batcher.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def reset(self, path: Optional[str] = None) -> None:
+        """Start a new transcript on the next write, for a new run, optionally in a different file."""
+        self.close()
+        if path is not None:
+            self.path = path
+        self._truncate = True
+
+    def discard(self) -> None:
+        """Close and delete the transcript, once the output it was following has been written in full."""
+        self.reset()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any) -> None:
+        self._batcher.reset()
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self._batcher.add(token)
+
+    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        self.close()
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        self.close()
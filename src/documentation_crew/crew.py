@@ -1,76 +1,327 @@
 """A CrewAI-based tool for generating codebase documentation from a given repository."""
+import asyncio
+import copy
 import json
-from datetime import datetime
+import os
+import re
+import threading
 from textwrap import dedent
-from typing import Dict, List, Tuple, Union
+from typing import Dict, Final, List, Optional, Tuple, Union
 from crewai import Agent, Task, Crew, Process
 from langchain_core.agents import AgentFinish
 import streamlit as st
-from .tools import DirectoryReadTool, AbsPathFileReadTool
+from streamlit.delta_generator import DeltaGenerator
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from .callbacks import FileSinkCallbackHandler, StreamlitTokenHandler, attach_script_run_ctx
+from ._walk import compile_ignore_patterns
+from .tools import DirectoryReadTool, AbsPathFileReadTool, AbsPathFilesReadTool, load_gitignore
+from .utils import _timestamped_path, awrite_utf8_file, write_utf8_file
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson is an optional speedup
+    _json_loads = json.loads
+
+# Default number of crews, or section writers of the sequential crew, allowed to talk to the LLM at the same time.
+DEFAULT_MAX_PARALLEL_AGENTS = 4
+
+# Agent and task prompts, dedented once at import time. Templates are filled in with str.format.
+_REPOSITORY_ANALYZER_GOAL: Final[str] = dedent(
+    """Conduct an exhaustive analysis of the codebase structure, identifying all key 
+    components, dependencies, and architectural patterns while providing a detailed 
+    map of the project's organization."""
+    )
+_REPOSITORY_ANALYZER_BACKSTORY: Final[str] = dedent(
+    """You are a veteran software architect with decades of experience in dissecting 
+    complex codebases across various industries. Your keen eye for design patterns 
+    and ability to quickly grasp intricate system interactions have made you the 
+    go-to expert for understanding large-scale software projects. You've developed a 
+    proprietary method for creating visual and textual representations of code 
+    structures that even novice developers can understand. Your analysis forms the 
+    foundation upon which all other documentation is built."""
+    )
+
+_CODE_REVIEWER_GOAL: Final[str] = dedent(
+    """Perform a meticulous review of all code components, uncovering and documenting 
+    every feature, function, class, and their interactions while assessing code quality, 
+    performance implications, and adherence to best practices. Read related files together 
+    with a single Read Multiple Files call rather than one file at a time."""
+    )
+_CODE_REVIEWER_BACKSTORY: Final[str] = dedent(
+    """As a renowned code review specialist, you've honed your skills through years of 
+    contributing to open-source projects and leading development teams at top tech 
+    companies. Your extraordinary ability to understand code at both micro and macro 
+    levels allows you to provide insights that go beyond mere functionality. You're 
+    known for your comprehensive reviews that not only explain what the code does but 
+    why it's structured that way, potential optimizations, and how it fits into the larger 
+    system architecture. Your analyses have helped countless teams improve their codebases 
+    and onboard new developers efficiently. You work through a codebase in groups of related 
+    files, such as a module together with its tests and configuration, reading each group at once."""
+    )
+
+_DOCUMENTATION_WRITER_GOAL: Final[str] = dedent(
+    """With a unique background in both software engineering and technical writing, you've 
+    become the bridge between complex code and human understanding. Your documentation has 
+    been praised across the industry for its clarity, completeness, and ability to make even 
+    the most intricate systems accessible. You've developed a knack for anticipating questions 
+    developers might have and addressing them proactively in your writing. Your work has been 
+    used as a benchmark for documentation best practices in numerous tech companies and
+    open-source projects."""
+    )
+_DOCUMENTATION_WRITER_BACKSTORY: Final[str] = dedent(
+    """You are a skilled technical writer with a strong background in software development. 
+    You can translate complex software functionality and architecture into clear, concise, 
+    and well-structured documentation that is easily understood by developers of all skill levels."""
+    )
+
+_MARKDOWN_FORMATTER_GOAL: Final[str] = dedent(
+    """Create a visually stunning, highly organized, and easily navigable markdown document that 
+    enhances readability and user experience while ensuring all technical content is presented in 
+    the most effective manner possible."""
+    )
+_MARKDOWN_FORMATTER_BACKSTORY: Final[str] = dedent(
+    """As a markdown virtuoso, you've elevated technical documentation formatting to an art form. 
+    Your background in UX design, combined with your deep understanding of developer needs, allows 
+    you to create documents that are not just readable, but a joy to navigate. You've developed 
+    custom markdown extensions and styling techniques that have been adopted by major tech companies 
+    for their internal and public-facing documentation. Your formatted documents are known for their 
+    intuitive structure, making complex information easy to find and understand, even in the largest 
+    and most complicated projects."""
+    )
+
+_ANALYZE_REPO_STRUCTURE_DESCRIPTION: Final[str] = dedent(
+    """Conduct a thorough analysis of the repository structure at {path}. Your task is to:
+            1. Map out the complete directory structure, noting the purpose of each folder.
+            2. Identify all key files, including source code, configuration files, and assets.
+            3. Detect any design patterns evident in the file organization.
+            4. Analyze naming conventions used throughout the project.
+            5. Identify any modular or microservice architecture if present.
+            6. Note any deviation from standard project structures for the main programming language(s) 
+               used.
+            7. Highlight any build, test, or deployment scripts.
+            8. Identify documentation files or folders.
+            9. Please refer to all files by their absolute filepath. The following directories should be 
+               excluded from your analysis: {ignore_dirs}."""
+    )
+_ANALYZE_REPO_STRUCTURE_SHALLOW_SCOPE: Final[str] = (
+    "\nOnly consider the files directly inside {path}; its subdirectories are analyzed separately."
+    )
+_ANALYZE_REPO_STRUCTURE_EXPECTED_OUTPUT: Final[str] = dedent(
+    """Provide a detailed report on the repository structure that includes:
+            1. A hierarchical representation of the directory structure with descriptions for each significant folder.
+            2. A list of key files with brief descriptions of their purposes.
+            3. An analysis of the overall architectural approach evident from the file organization.
+            4. Insights into the project's adherence to or deviation from standard practices.
+            5. Identification of any missing crucial components or folders.
+            6. Recommendations for improving the repository structure if applicable.
+            7. A summary of the build and deployment setup based on relevant scripts or configuration files found."""
+    )
+
+_REVIEW_CODE_COMPONENTS_DESCRIPTION: Final[str] = dedent(
+    """Based on the repository analysis, perform a comprehensive review of the main code components in {path}. Your task involves:
+            1. Identifying and describing key features and functionalities of the project.
+            2. Analyzing important classes and functions, noting their purposes and interactions.
+            3. Recognizing and explaining design patterns and architectural decisions.
+            4. Evaluating the code quality, including readability, modularity, and adherence to best practices.
+            5. Assessing error handling and logging mechanisms.
+            6. Identifying any performance optimizations or scalability considerations.
+            7. Noting the use of external libraries, APIs, or services and their integration.
+            8. Analyzing any database schemas or data models used.
+            9. Reviewing test coverage and testing strategies employed.
+            10. Identifying potential areas for improvement or refactoring."""
+    )
+_REVIEW_CODE_COMPONENTS_EXPECTED_OUTPUT: Final[str] = dedent(
+    """Deliver a comprehensive analysis of the codebase that includes:
+            1. An overview of the main features and functionalities, explaining how they're implemented.
+            2. Detailed descriptions of critical classes and functions, including their roles, inputs, outputs, and key algorithms.
+            3. A catalog of design patterns and architectural decisions, with explanations of their benefits and trade-offs.
+            4. An assessment of code quality, highlighting areas of excellence and suggestions for improvement.
+            5. An analysis of error handling and logging strategies.
+            6. Insights into performance considerations and how they're addressed in the code.
+            7. A list of key external dependencies, explaining their purpose and integration points.
+            8. An overview of data models or database schemas used.
+            9. An evaluation of the testing approach and coverage.
+            10. Recommendations for code improvements, optimizations, or architectural refinements."""
+    )
+
+# The documentation is written one section at a time, in this order. Each entry is (heading, scope).
+_DOCUMENTATION_SECTIONS: Final[Tuple[Tuple[str, str], ...]] = (
+    ("README", "An overview of the project, including its purpose, main features, and a quick start guide."),
+    ("CONTRIBUTING", "Guidelines on how to contribute to the project."),
+    ("ARCHITECTURE", "A detailed explanation of the overall system design and design philosophy, each major component, "
+                     "module, or service, and the data flow and interactions between them."),
+    ("API Documentation", "Comprehensive documentation for all public interfaces, including function signatures, "
+                          "parameters, return values, and usage examples."),
+    ("CONFIGURATION", "A guide explaining all configurable options and environment variables."),
+    ("DEPLOYMENT", "Step-by-step instructions for building and deploying the project in different environments."),
+    ("DEVELOPMENT", "Instructions on setting up the development environment and workflow, and on how to extend or "
+                    "modify key functionalities."),
+    ("TESTING", "Details on the testing strategy and how to run tests."),
+    ("TROUBLESHOOTING", "A guide addressing common issues and their solutions."),
+    ("PERFORMANCE and SCALING", "Benchmarks and best practices for performance and scalability, if applicable."),
+    ("ADDITIONAL TOPICS", "Specialized topics relevant to the specific project, such as security, compliance, "
+                          "authentication, logging, error handling, or complex algorithms and business logic."),
+)
+
+_WRITE_SECTION_DESCRIPTION: Final[str] = dedent(
+    """Based on the repository analysis and code review, write the {section} section of the documentation for the codebase.
+            The section covers: {scope}
+
+            The other sections ({other_sections}) are written separately and combined with yours afterwards,
+            so stay within the scope of this section and do not repeat their content."""
+    )
+_WRITE_SECTION_EXPECTED_OUTPUT: Final[str] = dedent(
+    """The {section} section in well-formed markdown. It starts with the heading "## {section}" and uses only level
+        three or deeper headings below it. It makes effective use of markdown features such as code blocks, tables,
+        and lists. If the section does not apply to this project, a short paragraph explaining why."""
+    )
+
+_FORMAT_DOCUMENTATION_DESCRIPTION: Final[str] = (
+    'Format technical documentation for a codebase in well-formed markdown. Ensure the document is well-structured, easily navigable, and visually appealing.'
+    )
+_FORMAT_DOCUMENTATION_EXPECTED_OUTPUT: Final[str] = (
+    'A beautifully formatted markdown file containing the comprehensive codebase documentation.'
+    )
 
 class CodebaseDocumentationCrew:
-    def __init__(self, repo_path, llm, file_label="code_documentation"):
+    def __init__(self, repo_path, llm, file_label="code_documentation", include_formatter=False):
         self.repo_path = repo_path
-        self.ignore_dirs = ['.git', '.idea', '.vscode', '__pycache__', 'node_modules', 'venv', 'env']
+        self.ignore_dirs = ['.git', '.idea', '.vscode', '__pycache__', 'node_modules', 'venv', 'env', '*.egg-info']
         self.directory_tool = DirectoryReadTool(directory=repo_path, ignore_dirs=self.ignore_dirs)
-        self.file_tool = AbsPathFileReadTool(self.repo_path)
-        
         self.llm = llm
+        model_name = getattr(llm, 'model_name', None) or getattr(llm, 'model', None)
+        self.file_tool = AbsPathFileReadTool(self.repo_path, model=model_name)
+        self.files_tool = AbsPathFilesReadTool(self.repo_path, model=model_name, ignore_dirs=self.ignore_dirs)
 
         # Initialize agent variables
         self.repository_analyzer = None
         self.code_reviewer = None
-        self.documentation_writer = None
+        self.documentation_writers: List[Agent] = []
         self.markdown_formatter = None
         
         # Initialize task variables
         self.analyze_repo_structure = None
         self.review_code_components = None
-        self.write_documentation = None
+        self.write_documentation_tasks: List[Task] = []
         self.format_documentation = None
 
         self._output_file_label = file_label
+        self._output_dir = "output"
+        os.makedirs(self._output_dir, exist_ok=True)
+        self._include_formatter = include_formatter
+        self._script_run_ctx = None
+        self._writer_transcripts: List[FileSinkCallbackHandler] = []
+
+        # One chat message per agent, reused for all of its steps during a run.
+        self._agent_containers: Dict[str, DeltaGenerator] = {}
+        self._agent_slots: Dict[str, Dict[str, DeltaGenerator]] = {}
+        self._ui_lock = threading.Lock()
 
         self.create_agents()
         self.create_tasks()
 
+    def _output_file(self) -> str:
+        """Path of the documentation file; write_utf8_file adds the timestamp when the file is written."""
+        return os.path.join(self._output_dir, f"{self._output_file_label}.md")
+
+    def _transcript_file(self, section: Optional[str] = None) -> str:
+        """
+        Path of the file a documentation writer streams its raw output to while it is generated.
+
+        The path is timestamped like the documentation itself, so concurrent or repeated runs never write
+        to the same transcript.
+        """
+        suffix = f"_{re.sub(r'[^a-z0-9]+', '_', section.lower()).strip('_')}" if section else ""
+        return _timestamped_path(os.path.join(self._output_dir, f"{self._output_file_label}{suffix}.partial.md"))
+
+    def _get_script_run_ctx(self):
+        return self._script_run_ctx
+
+    def _capture_script_run_ctx(self):
+        """
+        Remember the Streamlit session starting a run so crew worker threads can render into it.
+
+        Agent containers belong to the script run that created them, so they are dropped here and
+        recreated on the first step of the new run.
+        """
+        self._script_run_ctx = get_script_run_ctx(suppress_warning=True)
+        with self._ui_lock:
+            self._agent_containers.clear()
+            self._agent_slots.clear()
+
+    def _agent_slot(self, agent_name: str, slot: str) -> DeltaGenerator:
+        """
+        Return one of the placeholders in an agent's chat message, creating the message on first use.
+
+        Args:
+            agent_name (str): The agent the placeholder belongs to.
+            slot (str): "header" for the agent name or "stream" for streamed tokens.
+
+        Returns:
+            DeltaGenerator: The placeholder, which is overwritten on every update.
+        """
+        with self._ui_lock:
+            if agent_name not in self._agent_containers:
+                container = st.chat_message("AI").container()
+                self._agent_containers[agent_name] = container
+                self._agent_slots[agent_name] = {
+                    "header": container.empty(),
+                    "stream": container.empty(),
+                }
+                self._agent_slots[agent_name]["header"].markdown(f"**{agent_name}**")
+            return self._agent_slots[agent_name][slot]
+
+    def _append_agent_log(self, agent_name: str, lines: List[str]):
+        """Add the lines of one step below the agent's earlier steps, sending each step to the browser once."""
+        self._agent_slot(agent_name, "header")
+        with self._ui_lock:
+            self._agent_containers[agent_name].code("\n".join(lines), language=None)
+
     def step_callback(
         self,
         agent_output: Union[str, List[Tuple[Dict, str]], AgentFinish],
         agent_name,
         *args,
+        stream_handler: Optional[StreamlitTokenHandler] = None,
     ):
-        with st.chat_message("AI"):
-            # Try to parse the output if it is a JSON string
-            if isinstance(agent_output, str):
+        attach_script_run_ctx(self._script_run_ctx)
+        # Try to parse the output if it looks like a JSON object or array; most steps are plain text
+        if isinstance(agent_output, str):
+            stripped = agent_output.lstrip()
+            if stripped[:1] in ("{", "["):
                 try:
-                    agent_output = json.loads(agent_output)
-                except json.JSONDecodeError:
+                    agent_output = _json_loads(stripped)
+                except ValueError:
                     pass
 
-            if isinstance(agent_output, list) and all(
-                isinstance(item, tuple) for item in agent_output
-            ):
-
-                for action, description in agent_output:
-                    # Print attributes based on assumed structure
-                    st.write(f"Agent Name: {agent_name}")
-                    st.write(f"Tool used: {getattr(action, 'tool', 'Unknown')}")
-                    st.write(f"Tool input: {getattr(action, 'tool_input', 'Unknown')}")
-                    st.write(f"{getattr(action, 'log', 'Unknown')}")
-                    with st.expander("Show observation"):
-                        st.markdown(f"Observation\n\n{description}")
-
-            # Check if the output is a dictionary as in the second case
-            elif isinstance(agent_output, AgentFinish):
-                st.write(f"Agent Name: {agent_name}")
-                output = agent_output.return_values
-                st.write(f"I finished my task:\n{output['output']}")
+        lines = []
+        if isinstance(agent_output, list) and all(
+            isinstance(item, tuple) for item in agent_output
+        ):
 
-            # Handle unexpected formats
+            for action, description in agent_output:
+                # Print attributes based on assumed structure
+                lines.append(f"Tool used: {getattr(action, 'tool', 'Unknown')}")
+                lines.append(f"Tool input: {getattr(action, 'tool_input', 'Unknown')}")
+                lines.append(f"{getattr(action, 'log', 'Unknown')}")
+                lines.append(f"Observation:\n{description}\n")
+
+        # Check if the output is a dictionary as in the second case
+        elif isinstance(agent_output, AgentFinish):
+            if stream_handler is not None and stream_handler.streamed:
+                # The final answer has already been streamed token by token.
+                lines.append("I finished my task.")
             else:
-                st.write(type(agent_output))
-                st.write(agent_output)
+                output = agent_output.return_values
+                lines.append(f"I finished my task:\n{output['output']}")
+
+        # Handle unexpected formats
+        else:
+            lines.append(f"{type(agent_output)}")
+            lines.append(f"{agent_output}")
+
+        self._append_agent_log(agent_name, lines)
 
     def create_agents(self):
         # file_tool_instruction = (
@@ -78,231 +329,328 @@ class CodebaseDocumentationCrew:
         #     "For example, use 'src/main.py' instead of '/src/main.py' or './src/main.py'."
         # )
                 
-        self.repository_analyzer = Agent(
-            role='Repository Analyzer',
-            goal=dedent(
-                """Conduct an exhaustive analysis of the codebase structure, identifying all key 
-                components, dependencies, and architectural patterns while providing a detailed 
-                map of the project's organization."""
-                ),
-            backstory=dedent(
-                """You are a veteran software architect with decades of experience in dissecting 
-                complex codebases across various industries. Your keen eye for design patterns 
-                and ability to quickly grasp intricate system interactions have made you the 
-                go-to expert for understanding large-scale software projects. You've developed a 
-                proprietary method for creating visual and textual representations of code 
-                structures that even novice developers can understand. Your analysis forms the 
-                foundation upon which all other documentation is built."""
-                ),
-            tools=[self.directory_tool, self.file_tool],
-            verbose=True,
-            llm=self.llm
-        )
+        self.repository_analyzer = self._build_repository_analyzer()
+        self.code_reviewer = self._build_code_reviewer()
 
-        self.code_reviewer = Agent(
-            role='Code Reviewer',
-            goal=dedent(
-                """Perform a meticulous review of all code components, uncovering and documenting 
-                every feature, function, class, and their interactions while assessing code quality, 
-                performance implications, and adherence to best practices."""
-                ),
-            backstory=dedent(
-                """As a renowned code review specialist, you've honed your skills through years of 
-                contributing to open-source projects and leading development teams at top tech 
-                companies. Your extraordinary ability to understand code at both micro and macro 
-                levels allows you to provide insights that go beyond mere functionality. You're 
-                known for your comprehensive reviews that not only explain what the code does but 
-                why it's structured that way, potential optimizations, and how it fits into the larger 
-                system architecture. Your analyses have helped countless teams improve their codebases 
-                and onboard new developers efficiently"""
-                ),
-            tools=[self.file_tool],
+        # One writer per section, so the section tasks can run concurrently.
+        self._writer_transcripts = [
+            FileSinkCallbackHandler(self._transcript_file(section)) for section, _ in _DOCUMENTATION_SECTIONS
+        ]
+        self.documentation_writers = [
+            self._build_documentation_writer(transcript, section)
+            for transcript, (section, _) in zip(self._writer_transcripts, _DOCUMENTATION_SECTIONS)
+        ]
+
+        # Not part of the default crew; only built when include_formatter is set.
+        if self._include_formatter:
+            formatter_stream = StreamlitTokenHandler(
+                "Markdown Formatter", self._get_script_run_ctx, lambda: self._agent_slot("Markdown Formatter", "stream")
+            )
+            self.markdown_formatter = Agent(
+                role='Markdown Formatter',
+                goal=_MARKDOWN_FORMATTER_GOAL,
+                backstory=_MARKDOWN_FORMATTER_BACKSTORY,
+                verbose=True,
+                llm=self._agent_llm(formatter_stream),
+                step_callback=lambda step: self.step_callback(step, "Markdown Formatter", stream_handler=formatter_stream)
+            )
+
+    def _agent_llm(self, *handlers, streaming: bool = False):
+        """
+        Return a copy of the crew's chat model that reports its LLM calls to the given callback handlers.
+
+        crewAI hands Agent(callbacks=...) to the agent executor as non-inheritable handlers, which never
+        reach the LLM calls it makes, so token handlers have to be attached to the model itself. Each agent
+        gets its own copy so the shared model does not collect every agent's handlers.
+
+        The copy is shallow and shares the model's API clients. It is not made with the model's copy(),
+        which leaves out the fields declared with exclude=True, such as the clients and tags, and yields a
+        model that fails on its first call.
+
+        Args:
+            handlers: The callback handlers of the agent.
+            streaming (bool): Turn token streaming on for the copy, for agents whose output is followed in a
+                transcript. Otherwise the copy streams if the shared model does.
+        """
+        llm = copy.copy(self.llm)
+        fields = dict(llm.__dict__, callbacks=list(handlers))
+        if streaming:
+            fields["streaming"] = True
+        # A shallow copy of a pydantic v1 model shares its __dict__ with the original; give it its own.
+        object.__setattr__(llm, "__dict__", fields)
+        return llm
+
+    def _build_repository_analyzer(self, directory_tool: Optional[DirectoryReadTool] = None) -> Agent:
+        """Build a repository analyzer listing directory_tool's directory, the repository root by default."""
+        stream = StreamlitTokenHandler(
+            "Repository Analyzer", self._get_script_run_ctx, lambda: self._agent_slot("Repository Analyzer", "stream")
+        )
+        return Agent(
+            role='Repository Analyzer',
+            goal=_REPOSITORY_ANALYZER_GOAL,
+            backstory=_REPOSITORY_ANALYZER_BACKSTORY,
+            tools=[directory_tool or self.directory_tool, self.file_tool],
             verbose=True,
-            llm=self.llm,
-            step_callback=lambda step: self.step_callback(step, "Code Reviewer")
+            llm=self._agent_llm(stream)
         )
 
-        self.documentation_writer = Agent(
+    def _build_documentation_writer(
+            self, transcript: FileSinkCallbackHandler, section: Optional[str] = None) -> Agent:
+        """Build a documentation writer, optionally dedicated to one section, that streams its output to a transcript."""
+        name = f"Documentation Writer ({section})" if section else "Documentation Writer"
+        stream = StreamlitTokenHandler(name, self._get_script_run_ctx, lambda: self._agent_slot(name, "stream"))
+        return Agent(
             role='Documentation Writer',
-            goal=dedent(
-                """With a unique background in both software engineering and technical writing, you've 
-                become the bridge between complex code and human understanding. Your documentation has 
-                been praised across the industry for its clarity, completeness, and ability to make even 
-                the most intricate systems accessible. You've developed a knack for anticipating questions 
-                developers might have and addressing them proactively in your writing. Your work has been 
-                used as a benchmark for documentation best practices in numerous tech companies and
-                open-source projects."""
-                ),
-            backstory=dedent(
-                """You are a skilled technical writer with a strong background in software development. 
-                You can translate complex software functionality and architecture into clear, concise, 
-                and well-structured documentation that is easily understood by developers of all skill levels."""
-                ),
+            goal=_DOCUMENTATION_WRITER_GOAL,
+            backstory=_DOCUMENTATION_WRITER_BACKSTORY,
             verbose=True,
-            llm=self.llm,
-            step_callback=lambda step: self.step_callback(step, "Documentation Writer")
+            llm=self._agent_llm(stream, transcript, streaming=True),
+            step_callback=lambda step: self.step_callback(step, name, stream_handler=stream)
         )
 
-        # No longer useed.
-        self.markdown_formatter = Agent(
-            role='Markdown Formatter',
-            goal=dedent(
-                """Create a visually stunning, highly organized, and easily navigable markdown document that 
-                enhances readability and user experience while ensuring all technical content is presented in 
-                the most effective manner possible."""
-                ),
-            backstory=dedent(
-                """As a markdown virtuoso, you've elevated technical documentation formatting to an art form. 
-                Your background in UX design, combined with your deep understanding of developer needs, allows 
-                you to create documents that are not just readable, but a joy to navigate. You've developed 
-                custom markdown extensions and styling techniques that have been adopted by major tech companies 
-                for their internal and public-facing documentation. Your formatted documents are known for their 
-                intuitive structure, making complex information easy to find and understand, even in the largest 
-                and most complicated projects."""
-                ),
+    def _build_code_reviewer(self) -> Agent:
+        stream = StreamlitTokenHandler(
+            "Code Reviewer", self._get_script_run_ctx, lambda: self._agent_slot("Code Reviewer", "stream")
+        )
+        return Agent(
+            role='Code Reviewer',
+            goal=_CODE_REVIEWER_GOAL,
+            backstory=_CODE_REVIEWER_BACKSTORY,
+            tools=[self.file_tool, self.files_tool],
             verbose=True,
-            llm=self.llm,
-            step_callback=lambda step: self.step_callback(step, "Markdown Formatter")
+            llm=self._agent_llm(stream),
+            step_callback=lambda step: self.step_callback(step, "Code Reviewer", stream_handler=stream)
         )
 
     def create_tasks(self):
-        self.analyze_repo_structure = Task(
-            description=dedent(
-                f"""Conduct a thorough analysis of the repository structure at {self.repo_path}. Your task is to:
-                        1. Map out the complete directory structure, noting the purpose of each folder.
-                        2. Identify all key files, including source code, configuration files, and assets.
-                        3. Detect any design patterns evident in the file organization.
-                        4. Analyze naming conventions used throughout the project.
-                        5. Identify any modular or microservice architecture if present.
-                        6. Note any deviation from standard project structures for the main programming language(s) 
-                           used.
-                        7. Highlight any build, test, or deployment scripts.
-                        8. Identify documentation files or folders.
-                        9. Please refer to all files by their absolute filepath. The following directories should be 
-                           excluded from your analysis: {', '.join(self.ignore_dirs)}."""
-                ),
-            agent=self.repository_analyzer,
-            expected_output=dedent(
-                """Provide a detailed report on the repository structure that includes:
-                        1. A hierarchical representation of the directory structure with descriptions for each significant folder.
-                        2. A list of key files with brief descriptions of their purposes.
-                        3. An analysis of the overall architectural approach evident from the file organization.
-                        4. Insights into the project's adherence to or deviation from standard practices.
-                        5. Identification of any missing crucial components or folders.
-                        6. Recommendations for improving the repository structure if applicable.
-                        7. A summary of the build and deployment setup based on relevant scripts or configuration files found."""
-                ),
-            callback=self.task_callback
+        self.analyze_repo_structure = self._build_analysis_task(self.repo_path, self.repository_analyzer)
+        self.review_code_components = self._build_review_task(
+            self.repo_path, self.code_reviewer, context=[self.analyze_repo_structure]
         )
 
-        self.review_code_components = Task(
-            description=dedent(
-                """Based on the repository analysis, perform a comprehensive review of the main code components. Your task involves:
-                        1. Identifying and describing key features and functionalities of the project.
-                        2. Analyzing important classes and functions, noting their purposes and interactions.
-                        3. Recognizing and explaining design patterns and architectural decisions.
-                        4. Evaluating the code quality, including readability, modularity, and adherence to best practices.
-                        5. Assessing error handling and logging mechanisms.
-                        6. Identifying any performance optimizations or scalability considerations.
-                        7. Noting the use of external libraries, APIs, or services and their integration.
-                        8. Analyzing any database schemas or data models used.
-                        9. Reviewing test coverage and testing strategies employed.
-                        10. Identifying potential areas for improvement or refactoring."""
-                ),
-            agent=self.code_reviewer,
-            expected_output=dedent(
-                """Deliver a comprehensive analysis of the codebase that includes:
-                        1. An overview of the main features and functionalities, explaining how they're implemented.
-                        2. Detailed descriptions of critical classes and functions, including their roles, inputs, outputs, and key algorithms.
-                        3. A catalog of design patterns and architectural decisions, with explanations of their benefits and trade-offs.
-                        4. An assessment of code quality, highlighting areas of excellence and suggestions for improvement.
-                        5. An analysis of error handling and logging strategies.
-                        6. Insights into performance considerations and how they're addressed in the code.
-                        7. A list of key external dependencies, explaining their purpose and integration points.
-                        8. An overview of data models or database schemas used.
-                        9. An evaluation of the testing approach and coverage.
-                        10. Recommendations for code improvements, optimizations, or architectural refinements."""
-                ),
-            context=[self.analyze_repo_structure],
+        self.write_documentation_tasks = [
+            self._build_section_task(section, scope, writer,
+                                     context=[self.analyze_repo_structure, self.review_code_components])
+            for writer, (section, scope) in zip(self.documentation_writers, _DOCUMENTATION_SECTIONS)
+        ]
+        # Merging the sections is a plain concatenation, done once the last one has been written.
+        self.write_documentation_tasks[-1].callback = self.merge_sections_callback
+
+        # Not part of the default crew; only built when include_formatter is set.
+        if self._include_formatter:
+            self.format_documentation = Task(
+                description=_FORMAT_DOCUMENTATION_DESCRIPTION,
+                agent=self.markdown_formatter,
+                expected_output=_FORMAT_DOCUMENTATION_EXPECTED_OUTPUT,
+                context=self.write_documentation_tasks,
+                callback=self.documentation_callback
+            )
+
+    def _build_analysis_task(self, path: str, agent: Agent, recursive: bool = True) -> Task:
+        description = _ANALYZE_REPO_STRUCTURE_DESCRIPTION.format(path=path, ignore_dirs=', '.join(self.ignore_dirs))
+        if not recursive:
+            description += _ANALYZE_REPO_STRUCTURE_SHALLOW_SCOPE.format(path=path)
+        return Task(
+            description=description,
+            agent=agent,
+            expected_output=_ANALYZE_REPO_STRUCTURE_EXPECTED_OUTPUT,
             callback=self.task_callback
         )
 
-        self.write_documentation = Task(
-            description=dedent(
-                """Create comprehensive documentation for the codebase based on the repository analysis and code review. Your task is to:
-
-                        1. Write an executive summary of the project, its purpose, and its main features.
-                        2. Detail the overall architecture and design philosophy of the project.
-                        3. Provide an in-depth explanation of each major component, module, or service.
-                        4. Document all public APIs, including function signatures, parameters, return values, and usage examples.
-                        5. Explain the data flow and interactions between different parts of the system.
-                        6. Describe the project's approach to common concerns like authentication, logging, and error handling.
-                        7. Detail any algorithms or complex business logic implemented in the code.
-                        8. Provide a guide on how to set up the development environment.
-                        9. Include instructions for building, testing, and deploying the project.
-                        10. Document any configuration options and environment variables.
-                        11. Explain how to extend or modify key functionalities.
-                        12. Include a troubleshooting section for common issues.
-                        13. If applicable, provide performance benchmarks or scalability information."""
-                ),
-            agent=self.documentation_writer,
-            expected_output=dedent(
-                """Deliver a beautifully formatted markdown file that includes the following sections:
-
-                    1. Table of Contents: A comprehensive, clickable guide to all sections of the document.
-                    2. README: An overview of the project, including its purpose, main features, and a quick start guide.
-                    3. CONTRIBUTING: Guidelines on how to contribute to the project.
-                    4. ARCHITECTURE: A detailed explanation of the overall system design and component interactions.
-                    5. API Documentation: Comprehensive documentation for all public interfaces.
-                    6. CONFIGURATION: A guide explaining all configurable options and environment variables.
-                    7. DEPLOYMENT: Step-by-step instructions for deploying the project in different environments.
-                    8. DEVELOPMENT: Instructions on setting up the development environment and workflow.
-                    9. TESTING: Details on the testing strategy and how to run tests.
-                    10. TROUBLESHOOTING: A guide addressing common issues and their solutions.
-                    11. PERFORMANCE and SCALING (if applicable): Benchmarks and best practices for performance and scalability.
-                    12. Additional specialized sections relevant to the specific project (e.g., SECURITY, COMPLIANCE).
-
-                    Each section should be clearly demarcated with appropriate headings, include all relevant information from the 
-                    original documentation, and be formatted for maximum readability and navigability. The document should make 
-                    effective use of markdown features such as code blocks, tables, lists, and internal links to create a cohesive 
-                    and user-friendly documentation resource."""
-                ),
-            context=[self.analyze_repo_structure, self.review_code_components],
-            output_file=f"output/{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}-{datetime.now().microsecond // 1000:03d}_{self._output_file_label}.md",
+    def _build_review_task(self, path: str, agent: Agent, context: List[Task]) -> Task:
+        return Task(
+            description=_REVIEW_CODE_COMPONENTS_DESCRIPTION.format(path=path),
+            agent=agent,
+            expected_output=_REVIEW_CODE_COMPONENTS_EXPECTED_OUTPUT,
+            context=context,
             callback=self.task_callback
         )
 
-        # No longer used
-        self.format_documentation = Task(
-            description=('Format technical documentation for a codebase in well-formed markdown. Ensure the document is well-structured, easily navigable, and visually appealing.'),
-            agent=self.markdown_formatter,
-            expected_output='A beautifully formatted markdown file containing the comprehensive codebase documentation.',
-            context=[self.write_documentation],
-            output_file=f"output/{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}-{datetime.now().microsecond // 1000:03d}_{self._output_file_label}.md",
+    def _build_section_task(self, section: str, scope: str, agent: Agent, context: List[Task]) -> Task:
+        other_sections = ', '.join(name for name, _ in _DOCUMENTATION_SECTIONS if name != section)
+        return Task(
+            description=_WRITE_SECTION_DESCRIPTION.format(section=section, scope=scope, other_sections=other_sections),
+            agent=agent,
+            expected_output=_WRITE_SECTION_EXPECTED_OUTPUT.format(section=section),
+            context=context,
             callback=self.task_callback
         )
 
     def task_callback(self, output):
         pass
 
+    @staticmethod
+    def merge_sections(sections: List[str]) -> str:
+        """
+        Combine the written sections into a single document with a table of contents.
+
+        Args:
+            sections (List[str]): The markdown of each section, in the order of _DOCUMENTATION_SECTIONS.
+
+        Returns:
+            str: The complete documentation.
+        """
+        toc = "\n".join(
+            f"- [{section}](#{re.sub(r'[^a-z0-9 -]', '', section.lower()).replace(' ', '-')})"
+            for section, _ in _DOCUMENTATION_SECTIONS
+        )
+        body = "\n\n".join(section.strip() for section in sections)
+        return f"## Table of Contents\n\n{toc}\n\n{body}\n"
+
+    def merge_sections_callback(self, output):
+        """Write the merged sections of a sequential run once its last section task has finished."""
+        sections = [task.output.raw if task.output else "" for task in self.write_documentation_tasks]
+        write_utf8_file(self._output_file(), self.merge_sections(sections))
+        for transcript in self._writer_transcripts:
+            transcript.discard()
+        self.task_callback(output)
+
+    def documentation_callback(self, output):
+        """Write a finished documentation task to a file named after the time it completed."""
+        write_utf8_file(self._output_file(), output.raw)
+        self.task_callback(output)
+
     def get_code_documentation_agents(self):
         return [
             self.repository_analyzer,
             self.code_reviewer,
-            self.documentation_writer,
+            *self.documentation_writers,
         ]
 
     def get_code_documentation_tasks(self):
         return [
             self.analyze_repo_structure,
             self.review_code_components,
-            self.write_documentation,
+            *self.write_documentation_tasks,
         ]
     
-    def code_documentation_crew(self) -> Crew:    
+    @staticmethod
+    def _max_parallel(max_parallel: Optional[int] = None) -> int:
+        """Resolve a concurrency limit, defaulting to MAX_PARALLEL_AGENTS or DEFAULT_MAX_PARALLEL_AGENTS."""
+        if max_parallel is None:
+            max_parallel = int(os.getenv('MAX_PARALLEL_AGENTS', DEFAULT_MAX_PARALLEL_AGENTS))
+        return max(1, max_parallel)
+
+    def code_documentation_crew(
+            self, process: Process = Process.sequential, max_parallel: Optional[int] = None) -> Crew:
+        """
+        Build the documentation crew.
+
+        Args:
+            process (Process): How tasks are scheduled. Process.hierarchical can be passed to have a manager
+                agent, running on the crew's LLM, delegate the tasks; it still runs them one at a time.
+            max_parallel (Optional[int]): Maximum number of sections written at once by the sequential
+                process. Defaults to the MAX_PARALLEL_AGENTS environment variable, or DEFAULT_MAX_PARALLEL_AGENTS.
+
+        Returns:
+            Crew: The crew running the analysis, review and section writing tasks.
+        """
+        for transcript, (section, _) in zip(self._writer_transcripts, _DOCUMENTATION_SECTIONS):
+            transcript.reset(self._transcript_file(section))
+        # The sequential process runs async tasks in the background and waits for all of them before it runs
+        # the next synchronous one. Every max_parallel async sections are followed by a synchronous one, so
+        # at most max_parallel sections are written at once. The hierarchical process rejects async tasks,
+        # so there the sections are written one at a time.
+        max_parallel = self._max_parallel(max_parallel)
+        for index, task in enumerate(self.write_documentation_tasks[:-1]):
+            task.async_execution = process == Process.sequential and index % (max_parallel + 1) != max_parallel
+        manager = {'manager_llm': self.llm} if process == Process.hierarchical else {}
         return Crew(
             agents=self.get_code_documentation_agents(),
             tasks=self.get_code_documentation_tasks(),
-            process=Process.sequential,
-            verbose=2
-        )
\ No newline at end of file
+            process=process,
+            verbose=2,
+            **manager
+        )
+
+    async def kickoff_async(self):
+        """Run the documentation crew in a worker thread without blocking the caller's event loop."""
+        self._capture_script_run_ctx()
+        return await self.code_documentation_crew().kickoff_async()
+
+    def get_shard_paths(self) -> List[Tuple[str, bool]]:
+        """
+        Split the repository into independently analyzable shards.
+
+        Returns:
+            List[Tuple[str, bool]]: One ``(path, recursive)`` pair per top-level subdirectory, plus a
+            non-recursive shard for the files that live directly in the repository root.
+        """
+        shards = []
+        has_root_files = False
+        gitignore = load_gitignore(self.repo_path)
+        ignore_pattern = compile_ignore_patterns(frozenset(self.ignore_dirs))
+        with os.scandir(self.repo_path) as entries:
+            for entry in sorted(entries, key=lambda e: e.name):
+                if entry.is_dir(follow_symlinks=False):
+                    if ignore_pattern is not None and ignore_pattern.match(entry.name):
+                        continue
+                    if gitignore is None or not gitignore.match_file(f"{entry.name}/"):
+                        shards.append((entry.path, True))
+                else:
+                    has_root_files = True
+        if has_root_files or not shards:
+            shards.insert(0, (self.repo_path, False))
+        return shards
+
+    def create_shard_crews(self) -> List[Crew]:
+        """Build one analyze-then-review crew per repository shard, each with its own agents."""
+        crews = []
+        for path, recursive in self.get_shard_paths():
+            analyzer = self._build_repository_analyzer(
+                DirectoryReadTool(
+                    directory=path, root=self.repo_path, recursive=recursive, ignore_dirs=self.ignore_dirs
+                )
+            )
+            reviewer = self._build_code_reviewer()
+            analysis = self._build_analysis_task(path, analyzer, recursive=recursive)
+            review = self._build_review_task(path, reviewer, context=[analysis])
+            crews.append(Crew(
+                agents=[analyzer, reviewer],
+                tasks=[analysis, review],
+                process=Process.sequential,
+                verbose=2
+            ))
+        return crews
+
+    async def kickoff_parallel(self, max_parallel: Optional[int] = None) -> str:
+        """
+        Analyze and review every shard concurrently, then write all documentation sections concurrently
+        from their combined output and merge them.
+
+        Args:
+            max_parallel (Optional[int]): Maximum number of crews running at once. Defaults to the
+                MAX_PARALLEL_AGENTS environment variable, or DEFAULT_MAX_PARALLEL_AGENTS.
+
+        Returns:
+            str: The merged documentation, which is also written to the output file.
+        """
+        self._capture_script_run_ctx()
+        semaphore = asyncio.Semaphore(self._max_parallel(max_parallel))
+
+        async def run_crew(crew: Crew):
+            async with semaphore:
+                return await crew.kickoff_async()
+
+        shards = self.create_shard_crews()
+        await asyncio.gather(*[run_crew(crew) for crew in shards])
+
+        # Each section gets its own writer agent, as agents are not safe to run concurrently.
+        context = [task for crew in shards for task in crew.tasks]
+        section_crews, transcripts = [], []
+        for section, scope in _DOCUMENTATION_SECTIONS:
+            transcripts.append(FileSinkCallbackHandler(self._transcript_file(section)))
+            writer = self._build_documentation_writer(transcripts[-1], section)
+            section_crews.append(Crew(
+                agents=[writer],
+                tasks=[self._build_section_task(section, scope, writer, context=context)],
+                process=Process.sequential,
+                verbose=2
+            ))
+        results = await asyncio.gather(*[run_crew(crew) for crew in section_crews])
+
+        documentation = self.merge_sections([result.raw for result in results])
+        await awrite_utf8_file(self._output_file(), documentation)
+        for transcript in transcripts:
+            transcript.discard()
+        return documentation
@@ -1,28 +1,55 @@
 # A simple Streamlit app to generate code documentation.
+import asyncio
 import streamlit as st
 from documentation_crew.crew import CodebaseDocumentationCrew
 from documentation_crew.utils import get_llm, LLMConfigError
 
 
+@st.cache_resource(show_spinner=False)
+def load_llm(llm_name, api_key):
+    """Build the LLM client once per model and key so its connection pool survives reruns."""
+    return get_llm(llm_name, api_key, streaming=True)
+
+
+def build_crew(repo_path, llm_name, api_key, file_label):
+    """
+    Return this session's documentation crew, building it again when the sidebar inputs have changed.
+
+    The crew holds the state of a run, so it is kept in the session rather than in st.cache_resource,
+    which would share it between browser sessions. Only the LLM client is shared.
+    """
+    inputs = (repo_path, llm_name, api_key, file_label)
+    if st.session_state.get("crew_inputs") != inputs or st.session_state.get("crew") is None:
+        st.session_state.crew = CodebaseDocumentationCrew(
+            repo_path=repo_path, llm=load_llm(llm_name, api_key), file_label=file_label
+        )
+        st.session_state.crew_inputs = inputs
+    return st.session_state.crew
+
+
+def clear_crew_cache():
+    """Drop this session's crew; other sessions keep theirs, as does the cached LLM client."""
+    st.session_state.pop("crew", None)
+    st.session_state.pop("crew_inputs", None)
+
+
 class CodebaseDocumentationGenUI:
 
-    def generate_documentation(self, repo_path, llm_name, api_key, file_label):
+    async def generate_documentation(self, repo_path, llm_name, api_key, file_label):
         if not repo_path:
             return "Please enter a valid path to a repository."
         try:
-            llm = get_llm(llm_name, api_key)
-        except ValueError as e:
-            return f"LLM Configuration Error: {e}"
+            crew = build_crew(repo_path, llm_name, api_key, file_label)
         except LLMConfigError as e:
             return f"LLM Configuration Error: {e}"
-        return CodebaseDocumentationCrew(repo_path=repo_path,llm=llm, file_label=file_label).code_documentation_crew().kickoff()
+        return await crew.kickoff_async()
 
     def document_generation(self):
 
         if st.session_state.generating:
-            st.session_state.documentation = self.generate_documentation(
+            st.session_state.documentation = asyncio.run(self.generate_documentation(
                 st.session_state.repo_path, st.session_state.llm_name, st.session_state.api_key , st.session_state.file_label
-            )
+            ))
 
         if st.session_state.documentation and st.session_state.documentation != "":
             # with st.container():
@@ -46,13 +73,13 @@ class CodebaseDocumentationGenUI:
                 """
             )
 
-            st.text_input("LLM model", key="llm_name", placeholder="gpt-4o-mini")
+            st.text_input("LLM model", key="llm_name", placeholder="gpt-4o-mini", on_change=clear_crew_cache)
 
-            st.text_input("API Key", key="api_key", placeholder="sk-1234567890")
+            st.text_input("API Key", key="api_key", placeholder="sk-1234567890", on_change=clear_crew_cache)
 
-            st.text_input("Repo Path", key="repo_path", placeholder="/path/to/repo")
+            st.text_input("Repo Path", key="repo_path", placeholder="/path/to/repo", on_change=clear_crew_cache)
 
-            st.text_input("File Label", key="file_label", placeholder="code_documentation")
+            st.text_input("File Label", key="file_label", placeholder="code_documentation", on_change=clear_crew_cache)
 
             if st.button("Generate"):
                 st.session_state.generating = True
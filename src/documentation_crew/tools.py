@@ -1,27 +1,310 @@
 """A custom tool to list files in a directory with the option to ignore specific subdirectories."""
+import functools
 import os
+import stat
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Type, Any, List, Dict
+from typing import Optional, Type, Any, ClassVar, FrozenSet, Iterable, Iterator, List, Tuple
+import pathspec
+import tiktoken
 from crewai_tools import BaseTool
+from pydantic import PrivateAttr
 from pydantic.v1 import BaseModel, Field
-    
+from ._walk import (
+    DEFAULT_LISTING_CACHE_SIZE, DEFAULT_MAX_LISTED_FILES, ListingCache, format_listing, listing_args, walk_files
+)
+
+# Default number of tokens of a single file returned to an agent; override with FILE_READ_TOKEN_BUDGET.
+DEFAULT_FILE_READ_TOKEN_BUDGET = 4000
+# Encoding used to count tokens for models tiktoken does not know about (e.g. Claude).
+DEFAULT_TOKEN_ENCODING = "cl100k_base"
+# Share of the token budget kept from the start of a truncated file; the rest comes from its end.
+TRUNCATION_HEAD_RATIO = 0.6
+# Characters per token assumed when no tokenizer can be loaded, such as offline without cached BPE files.
+CHARS_PER_TOKEN_ESTIMATE = 4
+# Number of normalized paths each AbsPathFileReadTool remembers.
+DEFAULT_NORMALIZED_PATH_CACHE_SIZE = 1024
+# Characters of file content kept in memory, shared by all AbsPathFileReadTool instances.
+DEFAULT_FILE_CACHE_MAX_CHARS = 64 * 1024 * 1024
+# Largest number of paths named in the note on files left out of an AbsPathFilesReadTool call.
+MAX_REPORTED_SKIPPED_FILES = 20
+
+@functools.lru_cache(maxsize=None)
+def _get_encoding(model: Optional[str]) -> Optional[tiktoken.Encoding]:
+    """Return the tokenizer of a model, or None if tiktoken cannot load one; either result is cached."""
+    try:
+        if model:
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                pass
+        return tiktoken.get_encoding(DEFAULT_TOKEN_ENCODING)
+    except Exception:
+        # tiktoken downloads its BPE files on first use, which fails without network access.
+        return None
+
+def _split_token_budget(budget: int) -> Tuple[int, int]:
+    """Split a token budget into the tokens kept from the start and from the end of a truncated text."""
+    head = int(budget * TRUNCATION_HEAD_RATIO)
+    return head, budget - head
+
+def truncate_to_tokens(text: str, budget: int, model: Optional[str] = None) -> Tuple[str, int]:
+    """
+    Truncate text to a token budget, keeping its beginning and end.
+
+    Args:
+        text (str): The text to truncate.
+        budget (int): Maximum number of tokens to keep. Zero or less disables truncation.
+        model (Optional[str]): Model name used to pick the tokenizer. Defaults to DEFAULT_TOKEN_ENCODING.
+
+    Returns:
+        Tuple[str, int]: The possibly truncated text, with a marker where tokens were elided, and the
+        token count of the original text. Without a tokenizer, both are estimated from the character count
+        with CHARS_PER_TOKEN_ESTIMATE.
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        token_count = -(-len(text) // CHARS_PER_TOKEN_ESTIMATE)
+        if budget <= 0 or token_count <= budget:
+            return text, token_count
+        head, tail = (count * CHARS_PER_TOKEN_ESTIMATE for count in _split_token_budget(budget))
+        elided = len(text) - head - tail
+        return f"{text[:head]}\n\n... [{elided} characters elided] ...\n\n{text[len(text) - tail:]}", token_count
+
+    tokens = encoding.encode(text, disallowed_special=())
+    if budget <= 0 or len(tokens) <= budget:
+        return text, len(tokens)
+
+    head, tail = _split_token_budget(budget)
+    elided = len(tokens) - head - tail
+    truncated = (
+        f"{encoding.decode(tokens[:head])}\n\n... [{elided} tokens elided] ...\n\n"
+        f"{encoding.decode(tokens[len(tokens) - tail:])}"
+    )
+    return truncated, len(tokens)
+
+def load_gitignore(root: str) -> Optional[pathspec.PathSpec]:
+    """
+    Load the .gitignore file at the root of a repository.
+
+    Args:
+        root (str): The repository root.
+
+    Returns:
+        Optional[pathspec.PathSpec]: The compiled patterns, or None if the repository has no readable .gitignore.
+    """
+    try:
+        with open(os.path.join(root, ".gitignore"), encoding="utf-8") as file:
+            return pathspec.PathSpec.from_lines("gitwildmatch", file)
+    except (OSError, UnicodeDecodeError):
+        return None
+
+def walk_repo(
+        root: str,
+        extra_ignores: Iterable[str] = (),
+        start: Optional[str] = None,
+        recursive: bool = True,
+        ) -> Iterator[str]:
+    """
+    Yield the paths of the files in a repository that are neither gitignored nor in an ignored directory.
+
+    Only the .gitignore at the repository root is honored. Symlinks are never followed, and symlinks to
+    directories are left out.
+
+    Args:
+        root (str): The repository root, without a trailing slash.
+        extra_ignores (Iterable[str]): Names or glob patterns of directories to skip at any depth, in
+            addition to the .gitignore patterns.
+        start (Optional[str]): A directory inside root to walk instead of the whole repository.
+        recursive (bool): Walk the subdirectories too. When False, only the files directly in the walked
+            directory are listed.
+
+    Returns:
+        Iterator[str]: The path of each file, prefixed with the directory that was walked.
+    """
+    spec = load_gitignore(root)
+    if spec is None:
+        return walk_files(start or root, frozenset(extra_ignores), None, recursive)
+    prefix_len = len(os.path.join(root, ""))
+
+    def is_ignored(path: str, is_dir: bool) -> bool:
+        relative_path = path[prefix_len:].replace(os.sep, "/")
+        return spec.match_file(f"{relative_path}/" if is_dir else relative_path)
+
+    return walk_files(start or root, frozenset(extra_ignores), is_ignored, recursive)
+
+def _list_directory(
+        root: str,
+        directory: str,
+        ignore_set: FrozenSet[str],
+        max_entries: Optional[int] = None,
+        recursive: bool = True,
+        ) -> str:
+    """
+    List a directory, recursively by default.
+
+    Args:
+        root (str): The repository root whose .gitignore applies, without a trailing slash.
+        directory (str): The directory to list, without a trailing slash.
+        ignore_set (FrozenSet[str]): Names of subdirectories to skip.
+        max_entries (Optional[int]): Largest number of files to list. None lists them all.
+        recursive (bool): List the files of the subdirectories too.
+
+    Returns:
+        str: The formatted list of file paths.
+    """
+    return format_listing(walk_repo(root, ignore_set, start=directory, recursive=recursive), max_entries)
+
+def _read_file(path: str, encoding: str, size: int) -> str:
+    """
+    Read a text file with raw os.read calls and decode it in one step, bypassing the buffered io layers.
+
+    Line endings are translated to '\\n' as a file opened in text mode would.
+
+    Args:
+        path (str): The absolute path of the file.
+        encoding (str): The encoding to use when reading the file.
+        size (int): Size of the file in bytes, used to read it in a single call when it has not grown.
+
+    Returns:
+        str: The content of the file.
+    """
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        chunks = []
+        while chunk := os.read(fd, max(size, 64 * 1024)):
+            chunks.append(chunk)
+    finally:
+        os.close(fd)
+    content = b"".join(chunks).decode(encoding)
+    if "\r" in content:
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
+    return content
+
+class _FileContentCache:
+    """
+    Thread-safe LRU cache of decoded file contents, bounded by the total number of characters held.
+
+    Entries are keyed by (path, encoding) and hold the file's mtime_ns and size, its content, and its
+    truncations to token budgets; a lookup only hits when the file's current modification time and size
+    match. Truncations are kept so a cache hit does not tokenize the whole file again.
+
+    Args:
+        max_chars (int): Characters of content kept before the least recently read files are evicted.
+    """
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        # (path, encoding) -> [mtime_ns, size, content, truncations, chars held].
+        self._entries: OrderedDict = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: Tuple[str, str], mtime_ns: int, size: int) -> Optional[list]:
+        cached = self._entries.get(key)
+        if cached is None or cached[0] != mtime_ns or cached[1] != size:
+            return None
+        self._entries.move_to_end(key)
+        return cached
+
+    def _evict(self) -> None:
+        while self._chars > self.max_chars:
+            _, evicted = self._entries.popitem(last=False)
+            self._chars -= evicted[4]
+
+    def get(self, path: str, encoding: str, mtime_ns: int, size: int) -> Optional[str]:
+        """Return the cached content of an unchanged file, or None."""
+        with self._lock:
+            cached = self._lookup((path, encoding), mtime_ns, size)
+            return None if cached is None else cached[2]
+
+    def put(self, path: str, encoding: str, mtime_ns: int, size: int, content: str) -> None:
+        """Store the content of a file, replacing any stale entry for it."""
+        key = (path, encoding)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._chars -= previous[4]
+            if len(content) > self.max_chars:
+                return
+            self._entries[key] = [mtime_ns, size, content, {}, len(content)]
+            self._chars += len(content)
+            self._evict()
+
+    def get_truncated(
+            self, path: str, encoding: str, mtime_ns: int, size: int, budget: Tuple[int, Optional[str]]
+            ) -> Optional[Tuple[str, int]]:
+        """Return the truncation of an unchanged file to a (token budget, model) pair, or None."""
+        with self._lock:
+            cached = self._lookup((path, encoding), mtime_ns, size)
+            return None if cached is None else cached[3].get(budget)
+
+    def put_truncated(
+            self,
+            path: str,
+            encoding: str,
+            mtime_ns: int,
+            size: int,
+            budget: Tuple[int, Optional[str]],
+            truncated: Tuple[str, int],
+            ) -> None:
+        """Store the truncation of a file whose content is cached, as returned by truncate_to_tokens."""
+        with self._lock:
+            cached = self._lookup((path, encoding), mtime_ns, size)
+            if cached is None or budget in cached[3]:
+                return
+            cached[3][budget] = truncated
+            # A file within the budget is returned as is and costs nothing more to keep.
+            if truncated[0] is not cached[2]:
+                cached[4] += len(truncated[0])
+                self._chars += len(truncated[0])
+                self._evict()
+
+    def clear(self) -> None:
+        """Drop every cached file."""
+        with self._lock:
+            self._entries.clear()
+            self._chars = 0
+
+class _CachedLangchainTool(BaseTool):
+    """
+    BaseTool whose LangChain wrapper is built once rather than every time an agent executor is created.
+
+    crewAI converts every tool with to_langchain() whenever it sets up an agent, which re-derives the
+    argument schema and builds a new StructuredTool. The wrapper is rebuilt only when the name,
+    description or args_schema it was built from change.
+    """
+    _langchain_tool: Any = PrivateAttr(default=None)
+
+    def to_langchain(self):
+        key = (self.name, self.description, self.args_schema)
+        if self._langchain_tool is None or self._langchain_tool[0] != key:
+            self._langchain_tool = (key, super().to_langchain())
+        return self._langchain_tool[1]
+
 class DirectoryReadToolSchema(BaseModel):
     """
     Schema for the CustomDirectoryReadTool.
 
     Attributes:
         directory (str): Mandatory directory to list content.
-        ignore_dirs (Optional[List[str]]): List of subdirectories to ignore. Defaults to None.
+        ignore_dirs (Optional[List[str]]): List of names or glob patterns of subdirectories to ignore. Defaults to None.
     """
     directory: str = Field(..., description="Mandatory directory to list content")
-    ignore_dirs: Optional[List[str]] = Field(default=None, description="List of subdirectories to ignore")
+    ignore_dirs: Optional[List[str]] = Field(
+        default=None, description="List of names or glob patterns of subdirectories to ignore"
+    )
 
-class DirectoryReadTool(BaseTool):
+class DirectoryReadTool(_CachedLangchainTool):
     """
     A tool that can be used to recursively list a directory's content.
     Args:
         directory (Optional[str]): The directory to list the content of. If not provided, the directory will be set to None.
         ignore_dirs (Optional[List[str]]): A list of directories to ignore during the listing process. If not provided, the list will be set to None.
+        root (Optional[str]): The repository root whose .gitignore applies to listings inside it. Defaults to directory.
+        recursive (bool): Whether listings include the files of subdirectories. Defaults to True.
     Attributes:
         name (str): The name of the tool, set to "List files in directory".
         description (str): The description of the tool, initially set to "A tool that can be used to recursively list a directory's content.".
@@ -41,10 +324,19 @@ class DirectoryReadTool(BaseTool):
     args_schema: Type[BaseModel] = DirectoryReadToolSchema
     directory: Optional[str] = None
     ignore_dirs: Optional[List[str]] = None
+    root: Optional[str] = None
+    recursive: bool = True
+    listing_cache_size: int = DEFAULT_LISTING_CACHE_SIZE
+    max_entries: Optional[int] = DEFAULT_MAX_LISTED_FILES
+    # Listings keyed by (root, directory, ignored names, max entries, recursive, directory mtime).
+    _listing_cache: Optional[ListingCache] = PrivateAttr(default=None)
+    _ignore_set: FrozenSet[str] = PrivateAttr(default=frozenset())
 
     def __init__(self, directory: Optional[str] = None, ignore_dirs: Optional[List[str]] = None, **kwargs):
         super().__init__(**kwargs)
         self.ignore_dirs = ignore_dirs or []
+        self._ignore_set = frozenset(self.ignore_dirs)
+        self._listing_cache = ListingCache(self.listing_cache_size)
         if directory is not None:
             self.directory = directory
             self.description = f"A tool that can be used to list {directory}'s content."
@@ -55,28 +347,29 @@ class DirectoryReadTool(BaseTool):
             self, 
             **kwargs,
             ) -> Any:
-        directory = kwargs.get('directory', self.directory)
-        ignore_dirs = kwargs.get('ignore_dirs', self.ignore_dirs)
-        
-        if directory[-1] == "/":
-            directory = directory[:-1]
-        
-        files_list = []
-        for root, dirs, files in os.walk(directory):
-            dirs[:] = [d for d in dirs if d not in ignore_dirs]
-            
-            for filename in files:
-                file_path = os.path.join(root, filename).replace(directory, '').lstrip(os.path.sep)
-                path = Path(f"{directory}/{file_path}")
-                files_list.append(path.as_posix())
-        
-        files = "\n- ".join(files_list)
-        return f"File paths: \n- {files}"
+        directory, ignore_set = listing_args(kwargs, self.directory, self._ignore_set)
+        if directory is None:
+            return "Error: No directory provided."
+
+        # The .gitignore of the configured repository also applies when listing one of its subdirectories.
+        root = directory
+        repo_root = self.root or self.directory
+        if repo_root:
+            repo_root = repo_root.rstrip("/") or "/"
+            if directory == repo_root or directory.startswith(os.path.join(repo_root, "")):
+                root = repo_root
+
+        return self._listing_cache.get_or_list(
+            directory,
+            (root, directory, ignore_set, self.max_entries, self.recursive),
+            lambda: _list_directory(root, directory, ignore_set, self.max_entries, self.recursive),
+        )
 
     def _generate_description(self) -> None:
         ignore_dirs_str = ", ".join(self.ignore_dirs) if self.ignore_dirs else "None"
+        scope = "content" if self.recursive else "files, without descending into subdirectories"
         self.description = (
-            f"A tool that can be used to list {self.directory}'s content. "
+            f"A tool that can be used to list {self.directory}'s {scope}. "
             f"Ignoring subdirectories: {ignore_dirs_str}"
         )
 
@@ -85,24 +378,54 @@ class AbsPathFileReadToolSchema(BaseModel):
     file_path: str = Field(..., description="The path to a specific file to be read.")
     encoding: str = Field("utf-8", description="The encoding to use when reading the file.")
 
-class AbsPathFileReadTool(BaseTool):
+class AbsPathFileReadTool(_CachedLangchainTool):
     """Tool to read file contents with path normalization based on a provided base path."""
     name: str = "Read File"
     description: str = "Reads the contents of a file. Normalizes all relative and absolute file paths to a base path."
     args_schema: type[BaseModel] = AbsPathFileReadToolSchema
     base_path: Path
     max_file_size: int = 10 * 1024 * 1024  # 10 MB limit
+    token_budget: int = DEFAULT_FILE_READ_TOKEN_BUDGET
+    model: Optional[str] = None
+    norm_cache_size: int = DEFAULT_NORMALIZED_PATH_CACHE_SIZE
+    # File contents are shared by every instance, so agents reading the same file only pay for it once.
+    _shared_cache: ClassVar[_FileContentCache] = _FileContentCache(DEFAULT_FILE_CACHE_MAX_CHARS)
+    # Least recently requested paths and their normalized form.
+    _norm_cache: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    _norm_lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _base_str: str = PrivateAttr(default="")
+    _base_prefix: str = PrivateAttr(default="")
 
-    def __init__(self, base_path: str, max_file_size: int = 10 * 1024 * 1024, **kwargs):
+    def __init__(
+            self,
+            base_path: str,
+            max_file_size: int = 10 * 1024 * 1024,
+            token_budget: Optional[int] = None,
+            model: Optional[str] = None,
+            **kwargs,
+            ):
         """
         Initialize the tool with a base path and optional maximum file size.
 
         Args:
             base_path (str): The base path for file operations.
             max_file_size (int): Maximum file size in bytes (default 10MB).
+            token_budget (Optional[int]): Maximum number of tokens returned per file. Defaults to the
+                FILE_READ_TOKEN_BUDGET environment variable, or DEFAULT_FILE_READ_TOKEN_BUDGET.
+            model (Optional[str]): Name of the model reading the files, used to count tokens.
         """
-        super().__init__(base_path=Path(base_path).resolve(), max_file_size=max_file_size, **kwargs)
-        self._cache: Dict[str, str] = {}
+        if token_budget is None:
+            token_budget = int(os.getenv("FILE_READ_TOKEN_BUDGET", DEFAULT_FILE_READ_TOKEN_BUDGET))
+        super().__init__(
+            base_path=Path(base_path).resolve(),
+            max_file_size=max_file_size,
+            token_budget=token_budget,
+            model=model,
+            **kwargs,
+        )
+        # Path checks work on strings; these are derived from base_path once instead of on every call.
+        self._base_str = str(self.base_path)
+        self._base_prefix = os.path.join(self._base_str, "")
 
     def _normalize_path(self, file_path: str) -> Path:
         """
@@ -117,10 +440,63 @@ class AbsPathFileReadTool(BaseTool):
         Raises:
             ValueError: If the normalized path is outside the base path.
         """
-        normalized_path = (self.base_path / Path(file_path)).resolve()
-        if self.base_path not in normalized_path.parents and normalized_path != self.base_path:
+        with self._norm_lock:
+            cached = self._norm_cache.get(file_path)
+            if cached is not None:
+                self._norm_cache.move_to_end(file_path)
+                return cached
+
+        normalized_path = os.path.realpath(os.path.join(self._base_str, file_path))
+        # A prefix test on the resolved strings instead of walking Path.parents; the joined separator
+        # keeps '/base2' from matching '/base'.
+        if normalized_path != self._base_str and not normalized_path.startswith(self._base_prefix):
             raise ValueError(f"Access denied. File path '{file_path}' is outside the base directory.")
-        return normalized_path
+
+        # Only paths that passed the check are remembered; the base path never changes.
+        normalized = Path(normalized_path)
+        with self._norm_lock:
+            self._norm_cache[file_path] = normalized
+            if len(self._norm_cache) > self.norm_cache_size:
+                self._norm_cache.popitem(last=False)
+        return normalized
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Drop the file contents cached by all instances."""
+        cls._shared_cache.clear()
+
+    def _read_cached(self, path: str, encoding: str, mtime_ns: int, size: int) -> str:
+        """
+        Read a file through the content cache shared by all instances.
+
+        Args:
+            path (str): The absolute path of the file.
+            encoding (str): The encoding to use when reading the file.
+            mtime_ns (int): Modification time of the file; a change invalidates the cached content.
+            size (int): Size of the file in bytes; a change invalidates the cached content.
+
+        Returns:
+            str: The content of the file.
+        """
+        content = self._shared_cache.get(path, encoding, mtime_ns, size)
+        if content is None:
+            content = _read_file(path, encoding, size)
+            self._shared_cache.put(path, encoding, mtime_ns, size, content)
+        return content
+
+    def _read_truncated(self, path: str, encoding: str, mtime_ns: int, size: int) -> Tuple[str, int]:
+        """
+        Read a file through the shared cache and truncate it to the token budget, as truncate_to_tokens does.
+
+        The truncation is cached with the content, so only the first read of a file tokenizes it.
+        """
+        budget = (self.token_budget, self.model)
+        truncated = self._shared_cache.get_truncated(path, encoding, mtime_ns, size, budget)
+        if truncated is None:
+            content = self._read_cached(path, encoding, mtime_ns, size)
+            truncated = truncate_to_tokens(content, self.token_budget, self.model)
+            self._shared_cache.put_truncated(path, encoding, mtime_ns, size, budget, truncated)
+        return truncated
 
     def _run(self, file_path: str, encoding: str = "utf-8") -> str:
         """
@@ -135,22 +511,26 @@ class AbsPathFileReadTool(BaseTool):
         """
         try:
             full_path = self._normalize_path(file_path)
-            cache_key = f"{full_path}:{encoding}"
 
-            if cache_key in self._cache:
-                return f"Content of {full_path} (cached):\n\n{self._cache[cache_key]}"
-
-            if not full_path.is_file():
+            # One stat answers both whether the file exists and whether it is a regular file.
+            try:
+                st = os.stat(full_path)
+            except (FileNotFoundError, NotADirectoryError):
+                st = None
+            if st is None or not stat.S_ISREG(st.st_mode):
                 return f"Error: '{full_path}' is not a file or does not exist."
 
-            if full_path.stat().st_size > self.max_file_size:
+            if st.st_size > self.max_file_size:
                 return f"Error: File '{full_path}' exceeds the maximum allowed size of {self.max_file_size} bytes."
 
-            with open(full_path, 'r', encoding=encoding) as file:
-                content = file.read()
-
-            self._cache[cache_key] = content
-            return f"Content of {full_path}:\n\n{content}"
+            content, token_count = self._read_truncated(str(full_path), encoding, st.st_mtime_ns, st.st_size)
+            if token_count > self.token_budget > 0:
+                head, tail = _split_token_budget(self.token_budget)
+                return (
+                    f"Content of {full_path} ({token_count} tokens, truncated to the first {head} and last "
+                    f"{tail} tokens):\n\n{content}"
+                )
+            return f"Content of {full_path} ({token_count} tokens):\n\n{content}"
 
         except UnicodeDecodeError:
             return f"Error: Unable to decode '{file_path}' with encoding '{encoding}'. Try a different encoding."
@@ -160,3 +540,142 @@ class AbsPathFileReadTool(BaseTool):
             return f"Error: Permission denied when trying to read '{file_path}'."
         except Exception as e:
             return f"Error reading file '{file_path}': {str(e)}"
+
+
+class AbsPathFilesReadToolSchema(BaseModel):
+    """Schema for the AbsPathFilesReadTool."""
+    paths: List[str] = Field(
+        ...,
+        description="The paths of the files to be read together. A directory reads all of its files that are not ignored.",
+    )
+    encoding: str = Field("utf-8", description="The encoding to use when reading the files.")
+
+class AbsPathFilesReadTool(AbsPathFileReadTool):
+    """Tool to read several files in a single call, using the same path normalization as AbsPathFileReadTool."""
+    name: str = "Read Multiple Files"
+    description: str = (
+        "Reads the contents of several files in one call. Provide a list of paths to related files, "
+        "such as a module and its tests, or a directory to review them together."
+    )
+    args_schema: type[BaseModel] = AbsPathFilesReadToolSchema
+    max_chars: int = 256 * 1024  # Combined output limit per call
+    max_workers: int = 8
+    max_entries: Optional[int] = DEFAULT_MAX_LISTED_FILES  # Files a call expands its directories to
+    ignore_dirs: List[str] = []
+
+    def __init__(
+            self,
+            base_path: str,
+            max_file_size: int = 10 * 1024 * 1024,
+            max_chars: int = 256 * 1024,
+            ignore_dirs: Optional[List[str]] = None,
+            **kwargs,
+            ):
+        """
+        Initialize the tool with a base path, an optional maximum file size and a per-call output limit.
+
+        Args:
+            base_path (str): The base path for file operations.
+            max_file_size (int): Maximum file size in bytes (default 10MB).
+            max_chars (int): Maximum number of characters returned by a single call (default 256K).
+            ignore_dirs (Optional[List[str]]): Names of subdirectories skipped when a directory is read, in
+                addition to the patterns in the base path's .gitignore.
+        """
+        super().__init__(
+            base_path,
+            max_file_size=max_file_size,
+            max_chars=max_chars,
+            ignore_dirs=ignore_dirs or [],
+            **kwargs,
+        )
+
+    def _expand_paths(self, paths: List[str]) -> Tuple[List[str], bool]:
+        """
+        Replace directories with the files they contain and drop duplicate paths, keeping the requested order.
+
+        Directories are expanded until the call holds max_entries paths; the walk stops there.
+
+        Args:
+            paths (List[str]): The requested file and directory paths.
+
+        Returns:
+            Tuple[List[str], bool]: The paths of the files to read, and whether a directory was cut short.
+        """
+        # A dict keeps the first occurrence of every path, in order.
+        expanded = {}
+        capped = False
+        for path in paths:
+            try:
+                full_path = self._normalize_path(path)
+            except ValueError:
+                # Left in place so the read reports the access error for this path.
+                expanded.setdefault(path)
+                continue
+            if not full_path.is_dir():
+                expanded.setdefault(str(full_path))
+                continue
+            files = walk_repo(self._base_str, self.ignore_dirs, start=str(full_path))
+            try:
+                for file in files:
+                    if self.max_entries and len(expanded) >= self.max_entries:
+                        capped = True
+                        break
+                    expanded.setdefault(file)
+            finally:
+                files.close()
+        return list(expanded), capped
+
+    def _run(self, paths: List[str], encoding: str = "utf-8") -> str:
+        """
+        Read the specified files concurrently and return their contents in the order requested.
+
+        Reading stops at the first file that would push the combined output over max_chars; it and the
+        files after it are named at the end so they can be requested in another call. Only a few reads run
+        ahead of the output, so files past the limit are never read.
+
+        Args:
+            paths (List[str]): The paths to the files or directories to be read.
+            encoding (str): The encoding to use when reading the files.
+
+        Returns:
+            str: The concatenated contents or error messages of the files.
+        """
+        paths, capped = self._expand_paths(paths)
+        if not paths:
+            return "Error: No file paths provided."
+
+        read_file = functools.partial(AbsPathFileReadTool._run, self, encoding=encoding)
+        workers = min(self.max_workers, len(paths))
+        sections = []
+        total = 0
+        read = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Reads are submitted in order and consumed in order, one new read for every result used.
+            window = deque(executor.submit(read_file, path) for path in paths[:workers])
+            while window:
+                result = window.popleft().result()
+                if sections and total + len(result) > self.max_chars:
+                    break
+                sections.append(result)
+                total += len(result)
+                read += 1
+                if read + len(window) < len(paths):
+                    window.append(executor.submit(read_file, paths[read + len(window)]))
+            for future in window:
+                future.cancel()
+
+        skipped = paths[read:]
+        if skipped:
+            listed = ", ".join(skipped[:MAX_REPORTED_SKIPPED_FILES])
+            if len(skipped) > MAX_REPORTED_SKIPPED_FILES:
+                listed += f" and {len(skipped) - MAX_REPORTED_SKIPPED_FILES} more"
+            sections.append(
+                f"Not read because the combined output limit of {self.max_chars} characters was reached: "
+                f"{listed}. Request these files in another call."
+            )
+        if capped:
+            sections.append(
+                f"Only the first {self.max_entries} files of the requested directories were considered. "
+                "Request a subdirectory to read the rest."
+            )
+        return "\n\n".join(sections)
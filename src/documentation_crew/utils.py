@@ -1,10 +1,14 @@
 # Various Utilities
-from langchain_anthropic import ChatAnthropic
-from langchain_openai import ChatOpenAI
+import functools
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Tuple
+import aiofiles
 
 # LLM Factory
 
-class LLMConfigError(Exception):
+class LLMConfigError(ValueError):
     """Custom exception class for bad LLM Configuration information."""
     
     def __init__(self, message, error_code=None):
@@ -15,13 +19,92 @@ class LLMConfigError(Exception):
         # Customize the string representation of the exception
         return f"{super().__str__()} (Error Code: {self.error_code})"
     
-def get_llm(model: str, api_key: str, temperature: float = 0):
-    """A simple LLM factory"""
+@functools.lru_cache(maxsize=None)
+def configure_llm_cache():
+    """
+    Install the on-disk LLM response cache, once per process.
+
+    Re-running the crew on an unchanged repository then answers identical prompts without an API
+    call. The cache file is read from LLM_CACHE_PATH when the first LLM is built, after any .env file
+    has been loaded; set it to an empty value to disable the cache.
+    """
+    cache_path = os.getenv("LLM_CACHE_PATH", ".llm_cache.sqlite")
+    if cache_path:
+        from langchain.globals import set_llm_cache
+        from langchain_community.cache import SQLiteCache
+        set_llm_cache(SQLiteCache(database_path=cache_path))
+
+# Provider SDKs are imported on first use, so only the selected provider's import cost is paid.
+@functools.cache
+def _load_anthropic():
+    from langchain_anthropic import ChatAnthropic
+    return ChatAnthropic
+
+@functools.cache
+def _load_openai():
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI
+
+@functools.cache
+def _http_client():
+    """Keep-alive connection pool shared by every OpenAI client, so parallel agents reuse connections."""
+    import httpx
+    return httpx.Client(limits=httpx.Limits(max_keepalive_connections=64, max_connections=128))
+
+def _make_anthropic(model: str, api_key: str, temperature: float, streaming: bool):
+    return _load_anthropic()(anthropic_api_key=api_key, model=model, temperature=temperature, streaming=streaming)
+
+def _make_openai(model: str, api_key: str, temperature: float, streaming: bool):
+    return _load_openai()(
+        model=model, temperature=temperature, openai_api_key=api_key, streaming=streaming, http_client=_http_client()
+    )
+
+# Model name prefixes and the factories building their chat models, checked in order.
+_LLM_FACTORIES: Tuple[Tuple[str, Callable], ...] = (
+    ("claude", _make_anthropic),
+    ("gpt", _make_openai),
+)
+
+@functools.lru_cache(maxsize=32)
+def _build_llm(factory: Callable, model: str, api_key: str, temperature: float, streaming: bool):
+    """Build a chat model once per configuration; the clients are stateless and safe to share."""
+    return factory(model, api_key, temperature, streaming)
+
+def get_llm(model: str, api_key: str, temperature: float = 0, streaming: bool = False):
+    """A simple LLM factory. Set streaming to emit tokens to callbacks as they are generated."""
     if not api_key:
         raise LLMConfigError("API Key not provided.", error_code=400)
-    if model.startswith("claude"):
-        return ChatAnthropic(anthropic_api_key=api_key, model=model, temperature=temperature)
-    elif model.startswith("gpt"):
-        return ChatOpenAI(model=model, temperature=temperature, openai_api_key=api_key)
-    else:
-        raise LLMConfigError("Invalid model provided.", error_code=400)
\ No newline at end of file
+    configure_llm_cache()
+    for prefix, factory in _LLM_FACTORIES:
+        if model.startswith(prefix):
+            return _build_llm(factory, model, api_key, temperature, streaming)
+    raise LLMConfigError("Invalid model provided.", error_code=400)
+
+def _timestamped_path(output_filepath):
+    """Insert the current time before the extension so repeated writes never overwrite each other."""
+    current_time = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    directory, filename = os.path.split(output_filepath)
+    name, ext = os.path.splitext(filename)
+    return os.path.join(directory, f"{name}_{current_time}{ext}")
+
+# Write a file
+def write_utf8_file(output_filepath, content):
+    """Write content to a timestamped copy of output_filepath and return the path written."""
+    new_filepath = _timestamped_path(output_filepath)
+    try:
+        Path(new_filepath).write_text(content, encoding="utf-8")
+        print(f"File successfully written to {new_filepath}")
+    except IOError as e:
+        print(f"An error occurred while writing the file: {e}")
+    return new_filepath
+
+async def awrite_utf8_file(output_filepath, content):
+    """Async variant of write_utf8_file that does not block the event loop while writing."""
+    new_filepath = _timestamped_path(output_filepath)
+    try:
+        async with aiofiles.open(new_filepath, 'w', encoding="utf-8") as file:
+            await file.write(content)
+        print(f"File successfully written to {new_filepath}")
+    except IOError as e:
+        print(f"An error occurred while writing the file: {e}")
+    return new_filepath
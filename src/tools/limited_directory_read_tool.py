@@ -1,19 +1,24 @@
 """A custom tool to list files in a directory with the option to ignore specific subdirectories."""
-import os
-from typing import Optional, Type, Any, List
+from typing import Optional, Type, Any, FrozenSet, List
 from crewai_tools import BaseTool
+from documentation_crew._walk import (
+    DEFAULT_LISTING_CACHE_SIZE, DEFAULT_MAX_LISTED_FILES, ListingCache, format_listing, listing_args, walk_files
+)
+from pydantic import PrivateAttr
 from pydantic.v1 import BaseModel, Field
-    
+
 class DirectoryReadToolSchema(BaseModel):
     """
     Schema for the CustomDirectoryReadTool.
 
     Attributes:
         directory (str): Mandatory directory to list content.
-        ignore_dirs (Optional[List[str]]): List of subdirectories to ignore. Defaults to None.
+        ignore_dirs (Optional[List[str]]): List of names or glob patterns of subdirectories to ignore. Defaults to None.
     """
     directory: str = Field(..., description="Mandatory directory to list content")
-    ignore_dirs: Optional[List[str]] = Field(default=None, description="List of subdirectories to ignore")
+    ignore_dirs: Optional[List[str]] = Field(
+        default=None, description="List of names or glob patterns of subdirectories to ignore"
+    )
 
 class DirectoryReadTool(BaseTool):
     """
@@ -37,39 +42,38 @@ class DirectoryReadTool(BaseTool):
     """
     name: str = "List files in directory"
     description: str = "A tool that can be used to recursively list a directory's content."
-    args_schema: Type[BaseModel] = CustomDirectoryReadToolSchema
+    args_schema: Type[BaseModel] = DirectoryReadToolSchema
     directory: Optional[str] = None
     ignore_dirs: Optional[List[str]] = None
+    listing_cache_size: int = DEFAULT_LISTING_CACHE_SIZE
+    max_entries: Optional[int] = DEFAULT_MAX_LISTED_FILES
+    # Listings keyed by (directory, ignored names, max entries, directory mtime).
+    _listing_cache: Optional[ListingCache] = PrivateAttr(default=None)
+    _ignore_set: FrozenSet[str] = PrivateAttr(default=frozenset())
 
     def __init__(self, directory: Optional[str] = None, ignore_dirs: Optional[List[str]] = None, **kwargs):
         super().__init__(**kwargs)
         self.ignore_dirs = ignore_dirs or []
+        self._ignore_set = frozenset(self.ignore_dirs)
+        self._listing_cache = ListingCache(self.listing_cache_size)
         if directory is not None:
             self.directory = directory
             self.description = f"A tool that can be used to list {directory}'s content."
-            self.args_schema = CustomDirectoryReadToolSchema
+            self.args_schema = DirectoryReadToolSchema
             self._generate_description()
 
     def _run(
             self, 
             **kwargs,
             ) -> Any:
-        directory = kwargs.get('directory', self.directory)
-        ignore_dirs = kwargs.get('ignore_dirs', self.ignore_dirs)
-        
-        if directory[-1] == "/":
-            directory = directory[:-1]
-        
-        files_list = []
-        for root, dirs, files in os.walk(directory):
-            dirs[:] = [d for d in dirs if d not in ignore_dirs]
-            
-            for filename in files:
-                file_path = os.path.join(root, filename).replace(directory, '').lstrip(os.path.sep)
-                files_list.append(f"{directory}/{file_path}")
-        
-        files = "\n- ".join(files_list)
-        return f"File paths: \n- {files}"
+        directory, ignore_set = listing_args(kwargs, self.directory, self._ignore_set)
+        if directory is None:
+            return "Error: No directory provided."
+        return self._listing_cache.get_or_list(
+            directory,
+            (directory, ignore_set, self.max_entries),
+            lambda: format_listing(walk_files(directory, ignore_set), self.max_entries),
+        )
 
     def _generate_description(self) -> None:
         ignore_dirs_str = ", ".join(self.ignore_dirs) if self.ignore_dirs else "None"